@@ -1,13 +1,112 @@
-from fastapi import FastAPI, Form, HTTPException
+import asyncio
+import atexit
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import requests
+from fastapi.responses import ORJSONResponse
+import httpx
 import logging
+import logging.handlers
+import orjson
+import os
+import queue
+import re
+import threading
+
+# Optional dependencies for the semantic cache
+try:
+    from sentence_transformers import SentenceTransformer
+    import hnswlib
+except ImportError:
+    SentenceTransformer = None
+    hnswlib = None
+
+# Set up logging: request handlers only enqueue records, a background thread writes them
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+
+OLLAMA_URL = "http://localhost:11434"
+
+# Keep Mistral loaded in Ollama indefinitely instead of the default 5 minutes
+KEEP_ALIVE = -1
+
+# Minimum cosine similarity for a semantic cache hit
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Shared connection pool to Ollama, opened on startup and closed on shutdown
+client = None
+
+# Embedding-based cache, only available when its optional dependencies are installed
+semantic_cache = None
+
+# Groups concurrent cache misses into batched Ollama calls
+batcher = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared Ollama client, semantic cache and batcher for the lifetime of the app."""
+    global client, semantic_cache, batcher
+    if SentenceTransformer is not None and hnswlib is not None:
+        semantic_cache = await run_in_threadpool(SemanticCache, SEMANTIC_CACHE_THRESHOLD)
+        logger.info("Semantic cache enabled (threshold: %s)", SEMANTIC_CACHE_THRESHOLD)
+    client = httpx.AsyncClient(
+        base_url=OLLAMA_URL,
+        timeout=30.0,  # Add timeout to prevent hanging
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+    batcher = MicroBatcher(client)
+    batcher.start()
+    # Load Mistral before accepting traffic so the first request doesn't pay for it
+    await _preload_model(client)
+    try:
+        yield
+    finally:
+        await batcher.stop()
+        await client.aclose()
+
+async def _preload_model(ollama: httpx.AsyncClient) -> None:
+    """Ask Ollama to load Mistral into memory and keep it resident."""
+    try:
+        # A request without a prompt only loads the model
+        response = await ollama.post(
+            "/api/generate",
+            json={"model": "mistral", "keep_alive": KEEP_ALIVE},
+            timeout=120.0
+        )
+        if response.status_code == 200:
+            logger.info("Mistral model preloaded")
+        else:
+            logger.warning("Mistral preload failed with status %d", response.status_code)
+    except httpx.HTTPError as e:
+        logger.warning("Could not preload Mistral model: %s", e)
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """Return the pooled Ollama client so every request reuses its keep-alive connections."""
+    return client
 
-app = FastAPI(title="Sentiment Analyzer API", version="1.0.0")
+def get_batcher() -> "MicroBatcher":
+    """Return the shared micro-batcher that sends cache misses to Ollama."""
+    return batcher
+
+app = FastAPI(
+    title="Sentiment Analyzer API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # Add CORS middleware to allow frontend connections
 app.add_middleware(
@@ -22,104 +121,410 @@ app.add_middleware(
 def read_root():
     return {"message": "Sentiment Analyzer API is running!"}
 
+# Prompts are built once; requests only substitute the text.
+# The single-text prompt forces a one-token choice so Ollama stops after one decode step.
+PROMPT_TEMPLATE = (
+    'Analyze the sentiment of the following text.\n\n'
+    'Text: "%s"\n\n'
+    'Answer with one token: Positive, Negative, or Neutral.\n'
+    'Answer:'
+)
+BATCH_PROMPT_TEMPLATE = (
+    'Classify the sentiment of each numbered text below as Positive, Negative, or Neutral.\n'
+    'Respond with one line per text in the form "<number>. <sentiment>".\n\n'
+    '%s\n\n'
+    'Sentiments:\n'
+)
+
+SENTIMENT_RE = re.compile(r"\b(positive|negative|neutral)\b", re.IGNORECASE)
+
+# A one-token answer may hold only the start of a label (e.g. " Pos"); these prefixes are unambiguous
+LABEL_PREFIX_RE = re.compile(r"\b(pos|neg|neu)", re.IGNORECASE)
+LABEL_PREFIXES = {"pos": "Positive", "neg": "Negative", "neu": "Neutral"}
+
+# Longest input sent to the model
+MAX_TEXT_CHARS = 512
+
+# Exact-match LRU cache of normalized text -> (sentiment, raw model response)
+CACHE_MAX_SIZE = 10_000
+_sentiment_cache = OrderedDict()
+
+def _cache_key(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry."""
+    return text.strip().lower()
+
+def _cache_get(key: str):
+    """Return the cached (sentiment, raw_response) pair, or None on a miss."""
+    entry = _sentiment_cache.get(key)
+    if entry is not None:
+        _sentiment_cache.move_to_end(key)
+    return entry
+
+def _cache_put(key: str, entry) -> None:
+    """Store a result, evicting the least recently used entry when full."""
+    _sentiment_cache[key] = entry
+    _sentiment_cache.move_to_end(key)
+    if len(_sentiment_cache) > CACHE_MAX_SIZE:
+        _sentiment_cache.popitem(last=False)
+
+class SemanticCache:
+    """Reuse the sentiment of previously analyzed texts that mean nearly the same thing."""
+    
+    def __init__(self, threshold: float, max_elements: int = CACHE_MAX_SIZE):
+        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.index = hnswlib.Index(space="cosine", dim=self.model.get_sentence_embedding_dimension())
+        self.index.init_index(max_elements=max_elements)
+        # hnswlib reports cosine distance, i.e. 1 - similarity
+        self.max_distance = 1.0 - threshold
+        self.entries = {}
+        self.lock = threading.Lock()
+    
+    def embed(self, text: str):
+        """Embed text with the local MiniLM model (CPU-bound, run it off the event loop)."""
+        return self.model.encode(text, normalize_embeddings=True)
+    
+    def lookup(self, vector):
+        """Return the cached entry of the nearest neighbour if it is similar enough."""
+        with self.lock:
+            if not self.entries:
+                return None
+            ids, distances = self.index.knn_query(vector, k=1)
+        if distances[0][0] <= self.max_distance:
+            return self.entries[int(ids[0][0])]
+        return None
+    
+    def add(self, vector, entry) -> None:
+        """Index a new result; once the index is full, new texts are no longer added."""
+        with self.lock:
+            new_id = len(self.entries)
+            if new_id >= self.index.get_max_elements():
+                return
+            self.index.add_items(vector, [new_id])
+            self.entries[new_id] = entry
+
+async def _generate(ollama: httpx.AsyncClient, prompt: str, num_predict: int, stop=None, until=None) -> str:
+    """
+    Stream a generation from Ollama and return the raw text.
+    
+    Args:
+        until (callable): Optional predicate on the text so far; once it returns
+            True the stream is closed without waiting for the rest of the generation.
+            That also discards the pooled connection, so only pass it when stopping
+            early saves real decode steps
+    """
+    options = {
+        "temperature": 0.0,  # Greedy decoding: deterministic answers
+        "top_k": 1,
+        "num_predict": num_predict  # Limit response length to the expected answer
+    }
+    if stop:
+        options["stop"] = stop
+    
+    # Make request to Ollama without blocking the event loop
+    text = ""
+    async with ollama.stream(
+        "POST",
+        "/api/generate",
+        json={
+            "model": "mistral", 
+            "prompt": prompt, 
+            "stream": True,
+            "keep_alive": KEEP_ALIVE,
+            "options": options
+        }
+    ) as response:
+        if response.status_code != 200:
+            logger.error("Ollama request failed with status %d", response.status_code)
+            raise HTTPException(status_code=500, detail="Failed to connect to Ollama service")
+        
+        # Ollama streams one JSON object per line, each carrying the next token(s)
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            text += chunk.get("response", "")
+            if chunk.get("done") or (until is not None and until(text)):
+                break
+    
+    return text.strip()
+
+def _parse_sentiment(sentiment_raw: str) -> str:
+    """Coerce a raw model answer into Positive, Negative, or Neutral."""
+    # One regex scan finds the label anywhere, e.g. "The sentiment is Positive."
+    match = SENTIMENT_RE.search(sentiment_raw)
+    return match.group(1).title() if match else "Neutral"
+
+async def _classify(ollama: httpx.AsyncClient, text: str):
+    """
+    Ask Mistral for the sentiment of a single text.
+    
+    Returns:
+        tuple: (sentiment, raw_response)
+    """
+    prompt = PROMPT_TEMPLATE % text
+
+    # num_predict already ends generation after the answer; read to the final chunk
+    # so the keep-alive connection goes back to the pool
+    sentiment_raw = await _generate(ollama, prompt, num_predict=1, stop=["\n", "."])
+    match = LABEL_PREFIX_RE.search(sentiment_raw)
+    sentiment = LABEL_PREFIXES[match.group(1).lower()] if match else "Neutral"
+    return sentiment, sentiment_raw
+
+async def _classify_batch(ollama: httpx.AsyncClient, texts):
+    """
+    Ask Mistral for the sentiment of several texts in one generation.
+    
+    Returns:
+        list: (sentiment, raw_response) for each text, in order
+    """
+    # Keep every text on its own numbered line so answers can be matched back
+    items = "\n".join(f'{i}. "{" ".join(text.split())}"' for i, text in enumerate(texts, 1))
+    prompt = BATCH_PROMPT_TEMPLATE % items
+
+    # Stop reading once every text has a labelled answer line
+    response_raw = await _generate(
+        ollama, prompt, num_predict=8 * len(texts),
+        until=lambda so_far: len(_batch_answers(so_far)) >= len(texts)
+    )
+    answers = _batch_answers(response_raw)
+    
+    # Texts the model skipped or answered without numbering are asked about on their own
+    missing = [i for i in range(1, len(texts) + 1) if i not in answers]
+    if missing:
+        logger.warning("Batch answer covered %d of %d texts; classifying the rest singly",
+                       len(texts) - len(missing), len(texts))
+        fallback = await asyncio.gather(*(_classify(ollama, texts[i - 1]) for i in missing))
+    else:
+        fallback = []
+    resolved = dict(zip(missing, fallback))
+    
+    results = []
+    for i in range(1, len(texts) + 1):
+        if i in resolved:
+            results.append(resolved[i])
+        else:
+            results.append((_parse_sentiment(answers[i]), answers[i]))
+    return results
+
+def _batch_answers(response_raw: str) -> dict:
+    """Map "<number>. <answer>" lines that contain a sentiment label to their number."""
+    answers = {}
+    for line in response_raw.splitlines():
+        number, _, answer = line.strip().partition(".")
+        if number.isdigit() and SENTIMENT_RE.search(answer):
+            answers.setdefault(int(number), answer.strip())
+    return answers
+
+class MicroBatcher:
+    """Coalesce concurrent model calls into one Ollama generation per short time window."""
+    
+    def __init__(self, ollama: httpx.AsyncClient, max_batch_size: int = 8, max_wait: float = 0.02):
+        self.ollama = ollama
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.task = None
+        self.pending = set()
+    
+    def start(self) -> None:
+        """Start collecting batches in the background."""
+        self.task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the collector and any batches still in flight."""
+        for task in [self.task, *self.pending]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*filter(None, [self.task, *self.pending]), return_exceptions=True)
+    
+    async def submit(self, text: str):
+        """Queue a text and wait for its (sentiment, raw_response) result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first item, then gather more until the window closes
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Dispatch without waiting so the next window can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+    
+    async def _dispatch(self, batch) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            if len(texts) == 1:
+                results = [await _classify(self.ollama, texts[0])]
+            else:
+                results = await _classify_batch(self.ollama, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+# Lookups in progress, keyed like the exact-match cache
+_inflight = {}
+
+def _forget_inflight(key: str, task: asyncio.Future) -> None:
+    """Drop a finished lookup so later misses start a fresh one."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark a failure as retrieved even if every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+async def _resolve(batcher: MicroBatcher, text: str):
+    """
+    Find the sentiment of a text that missed the exact-match cache.
+    
+    Returns:
+        tuple: ((sentiment, raw_response), source)
+    """
+    # Look for a previously analyzed text with the same meaning
+    vector = None
+    if semantic_cache is not None:
+        vector = await run_in_threadpool(semantic_cache.embed, text)
+        entry = semantic_cache.lookup(vector)
+        if entry is not None:
+            return entry, "semantic_cache"
+    
+    entry = await batcher.submit(text)
+    # An empty answer was defaulted to Neutral, so don't let it answer similar texts
+    if vector is not None and entry[1]:
+        semantic_cache.add(vector, entry)
+    return entry, "model"
+
 @app.post("/analyze/")
-def analyze_sentiment(text: str = Form(...)):
+async def analyze_sentiment(
+    text: str = Form(...),
+    batcher: MicroBatcher = Depends(get_batcher)
+):
     """
     Analyze the sentiment of the provided text using Mistral model via Ollama.
     
     Args:
         text (str): The text to analyze
+        batcher (MicroBatcher): Shared micro-batcher, injected per request
         
     Returns:
-        dict: Contains the predicted sentiment
+        dict: Contains the predicted sentiment and where it came from
     """
     if not text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
     
+    # Prompt processing time grows with input length; the opening is enough to judge sentiment
+    text = text.strip()
+    if len(text) > MAX_TEXT_CHARS:
+        logger.info("Truncating text from %d to %d characters", len(text), MAX_TEXT_CHARS)
+        text = text[:MAX_TEXT_CHARS]
+    
     try:
-        # Create a more specific prompt for better sentiment classification
-        prompt = f"""Analyze the sentiment of the following text and respond with exactly one word: Positive, Negative, or Neutral.
-
-Text: "{text}"
-
-Sentiment:"""
-
-        # Make request to Ollama
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "mistral", 
-                "prompt": prompt, 
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,  # Lower temperature for more consistent results
-                    "top_p": 0.9,
-                    "num_predict": 10  # Limit response length for single word answers
-                }
-            },
-            timeout=30  # Add timeout to prevent hanging
-        )
+        # Repeated inputs are answered from the cache without touching the model
+        key = _cache_key(text)
+        entry = _cache_get(key)
+        source = "cache"
+        if entry is None:
+            # Identical texts that arrive while one is being analyzed share its result
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(_resolve(batcher, text))
+                _inflight[key] = task
+                task.add_done_callback(lambda done: _forget_inflight(key, done))
+            # Shield so one disconnecting client doesn't cancel the lookup for the others
+            entry, source = await asyncio.shield(task)
+            # An empty answer was defaulted to Neutral; ask the model again next time
+            if entry[1]:
+                _cache_put(key, entry)
+        sentiment_clean, sentiment_raw = entry
         
-        if response.status_code != 200:
-            logger.error(f"Ollama request failed with status {response.status_code}")
-            raise HTTPException(status_code=500, detail="Failed to connect to Ollama service")
-        
-        result = response.json()
-        sentiment_raw = result["response"].strip()
-        
-        # Clean and validate the response
-        sentiment_clean = sentiment_raw.split('\n')[0].strip().title()
-        
-        # Ensure the response is one of the expected values
-        valid_sentiments = ["Positive", "Negative", "Neutral"]
-        if sentiment_clean not in valid_sentiments:
-            # Try to extract sentiment from response if it's not exact
-            sentiment_lower = sentiment_clean.lower()
-            if "positive" in sentiment_lower:
-                sentiment_clean = "Positive"
-            elif "negative" in sentiment_lower:
-                sentiment_clean = "Negative"
-            else:
-                sentiment_clean = "Neutral"
-        
-        logger.info(f"Analyzed text: '{text[:50]}...' -> Sentiment: {sentiment_clean}")
+        logger.info("Analyzed len=%d -> %s (source: %s)", len(text), sentiment_clean, source)
         
         return {
             "sentiment": sentiment_clean,
             "text": text,
-            "raw_response": sentiment_raw
+            "raw_response": sentiment_raw,
+            "cached": source != "model",
+            "source": source
         }
         
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request to Ollama failed: {e}")
+    except httpx.HTTPError as e:
+        logger.error("Request to Ollama failed: %s", e)
+        # Don't let /health/ keep reporting Ollama as connected
+        _health_cache.clear()
         raise HTTPException(
             status_code=500, 
             detail="Could not connect to Ollama service. Make sure Ollama is running and Mistral model is available."
         )
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
+# The model list only changes when models are pulled or removed, so cache the answer briefly
+HEALTH_CACHE_TTL = 30
+_health_cache = TTLCache(maxsize=1, ttl=HEALTH_CACHE_TTL)
+
+# A model whose name starts with "mistral" (any case), whatever whitespace Ollama puts around the colon
+MISTRAL_TAG_RE = re.compile(rb'"name"\s*:\s*"mistral', re.IGNORECASE)
+
+# Bytes carried over between chunks so a match split across them is still found
+MISTRAL_TAG_OVERLAP = 64
+
+async def _scan_for_mistral(response: httpx.Response) -> bool:
+    """Stream the model list and stop as soon as a mistral model appears."""
+    tail = b""
+    async for chunk in response.aiter_bytes():
+        data = tail + chunk
+        if MISTRAL_TAG_RE.search(data):
+            return True
+        tail = data[-MISTRAL_TAG_OVERLAP:]
+    return False
+
 @app.get("/health/")
-def health_check():
+async def health_check(ollama: httpx.AsyncClient = Depends(get_ollama_client)):
     """Check if the API and Ollama service are healthy."""
+    mistral_available = _health_cache.get("mistral_available")
+    if mistral_available is not None:
+        return {
+            "api_status": "healthy",
+            "ollama_status": "connected",
+            "mistral_available": mistral_available
+        }
+    
     try:
         # Test connection to Ollama
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json()
-            mistral_available = any(model["name"].startswith("mistral") for model in models["models"])
-            return {
-                "api_status": "healthy",
-                "ollama_status": "connected",
-                "mistral_available": mistral_available
-            }
-        else:
-            return {
-                "api_status": "healthy",
-                "ollama_status": "error",
-                "mistral_available": False
-            }
+        async with ollama.stream("GET", "/api/tags", timeout=5) as response:
+            if response.status_code == 200:
+                mistral_available = await _scan_for_mistral(response)
+                _health_cache["mistral_available"] = mistral_available
+                return {
+                    "api_status": "healthy",
+                    "ollama_status": "connected",
+                    "mistral_available": mistral_available
+                }
+            else:
+                return {
+                    "api_status": "healthy",
+                    "ollama_status": "error",
+                    "mistral_available": False
+                }
     except Exception as e:
         return {
             "api_status": "healthy",
@@ -11,8 +11,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling (built once per server process)
+@st.cache_resource
+def _css():
+    return """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -53,7 +55,24 @@ st.markdown("""
         font-size: 1.1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+# Styling for each sentiment: CSS class and emoji
+SENTIMENT_STYLES = {
+    "positive": ("sentiment-positive", "😊"),
+    "negative": ("sentiment-negative", "😞"),
+    "neutral": ("sentiment-neutral", "😐"),
+}
+
+@st.cache_resource
+def _sample_texts():
+    return {
+        "Positive": "I absolutely love this new restaurant! The food was delicious and the service was exceptional.",
+        "Negative": "This movie was terrible. I wasted my money and fell asleep halfway through.",
+        "Neutral": "The meeting is scheduled for 2 PM tomorrow in conference room B. Please bring your laptops."
+    }
 
 # Main header
 st.markdown('<h1 class="main-header">🎭 Sentiment Analyzer</h1>', unsafe_allow_html=True)
@@ -142,27 +161,14 @@ with col2:
                         
                         # Display result with styling
                         sentiment_lower = sentiment.lower()
-                        if sentiment_lower == "positive":
-                            st.markdown(f"""
-                            <div class="sentiment-positive">
-                                <h3>😊 Sentiment: {sentiment}</h3>
-                                <p>The text expresses a positive sentiment.</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        elif sentiment_lower == "negative":
-                            st.markdown(f"""
-                            <div class="sentiment-negative">
-                                <h3>😞 Sentiment: {sentiment}</h3>
-                                <p>The text expresses a negative sentiment.</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div class="sentiment-neutral">
-                                <h3>😐 Sentiment: {sentiment}</h3>
-                                <p>The text expresses a neutral sentiment.</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        tone = sentiment_lower if sentiment_lower in SENTIMENT_STYLES else "neutral"
+                        css_class, emoji = SENTIMENT_STYLES[tone]
+                        st.markdown(f"""
+                        <div class="{css_class}">
+                            <h3>{emoji} Sentiment: {sentiment}</h3>
+                            <p>The text expresses a {tone} sentiment.</p>
+                        </div>
+                        """, unsafe_allow_html=True)
                         
                         # Additional info
                         with st.expander("📊 Analysis Details"):
@@ -170,7 +176,7 @@ with col2:
                             st.write(f"**Text length:** {len(text_input)} characters")
                             st.write(f"**Analyzed at:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                             if "raw_response" in result:
-                                st.write(f"**Raw model response:** {result['raw_response']}")
+                                st.write(f"**Generated token(s):** {result['raw_response']}")
                     else:
                         error_detail = response.json().get("detail", "Unknown error")
                         st.error(f"❌ Error: {error_detail}")
@@ -184,11 +190,7 @@ with col2:
 
 # Sample texts for testing
 st.subheader("💡 Try these sample texts:")
-sample_texts = {
-    "Positive": "I absolutely love this new restaurant! The food was delicious and the service was exceptional.",
-    "Negative": "This movie was terrible. I wasted my money and fell asleep halfway through.",
-    "Neutral": "The meeting is scheduled for 2 PM tomorrow in conference room B. Please bring your laptops."
-}
+sample_texts = _sample_texts()
 
 col1, col2, col3 = st.columns(3)
 
@@ -4,134 +4,216 @@ Startup script for the Sentiment Analyzer application
 Handles starting both backend and frontend services
 """
 
+import asyncio
+import importlib.util
+import json
 import subprocess
 import sys
 import time
 import signal
 import os
 import platform
-from pathlib import Path
+import urllib.error
+import urllib.request
+from collections import deque
+
+REQUIRED_PACKAGES = ("fastapi", "uvicorn", "streamlit", "requests")
+OLLAMA_TAGS_URL = "http://localhost:11434/api/tags"
+BACKEND_HEALTH_URL = "http://localhost:8000/health/"
+FRONTEND_HEALTH_URL = "http://localhost:8501/_stcore/health"
 
 class AppStarter:
     def __init__(self):
         self.backend_process = None
         self.frontend_process = None
-        self.running = True
+        self.backend_errors = deque(maxlen=50)
+        self.frontend_errors = deque(maxlen=50)
+        self.output_tasks = []
+        self.stop_event = None
 
-    def signal_handler(self, signum, frame):
+    def signal_handler(self, signum=None, frame=None):
         """Handle Ctrl+C gracefully."""
         print("\n🛑 Shutting down services...")
-        self.running = False
-        self.stop_services()
-        sys.exit(0)
+        self.stop_event.set()
 
     def setup_signal_handlers(self):
         """Set up signal handlers for graceful shutdown."""
+        loop = asyncio.get_running_loop()
         if platform.system() != "Windows":
             # Unix-like systems
-            signal.signal(signal.SIGINT, self.signal_handler)
-            signal.signal(signal.SIGTERM, self.signal_handler)
+            loop.add_signal_handler(signal.SIGINT, self.signal_handler)
+            loop.add_signal_handler(signal.SIGTERM, self.signal_handler)
         else:
-            # Windows
-            signal.signal(signal.SIGINT, self.signal_handler)
+            # Windows: the event loop doesn't support add_signal_handler
+            signal.signal(signal.SIGINT, lambda signum, frame: loop.call_soon_threadsafe(self.signal_handler))
             # SIGTERM is not available on Windows
 
-    def check_requirements(self):
+    async def _check_files(self):
+        """Check if we're in the right directory."""
+        # access(2) answers existence without building a full stat result
+        return os.access("backend/main.py", os.F_OK) and os.access("frontend/app.py", os.F_OK)
+
+    async def _check_imports(self):
+        """Return the required Python packages that cannot be found."""
+        loop = asyncio.get_running_loop()
+        # find_spec only walks sys.path, so run it in a thread while the network probe waits
+        specs = await loop.run_in_executor(
+            None, lambda: [(name, importlib.util.find_spec(name)) for name in REQUIRED_PACKAGES]
+        )
+        return [name for name, spec in specs if spec is None]
+
+    async def _http_get(self, url, timeout):
+        """GET a URL with the standard library in a worker thread; return (status, body)."""
+        def fetch():
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    return response.status, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, b""
+        
+        return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+    async def _check_ollama(self):
+        """Return (status_code, mistral_found) from Ollama's model list."""
+        status_code, body = await self._http_get(OLLAMA_TAGS_URL, timeout=3)
+        if status_code != 200:
+            return status_code, False
+        
+        models = json.loads(body)
+        # Same rule as the backend's /health/: the model name starts with "mistral"
+        mistral_found = any(model["name"].lower().startswith("mistral")
+                          for model in models.get("models", []))
+        return status_code, mistral_found
+
+    async def check_requirements(self):
         """Check if all requirements are met."""
         print("🔍 Checking requirements...")
         
-        # Check if we're in the right directory
-        if not Path("backend/main.py").exists() or not Path("frontend/app.py").exists():
+        # The checks are independent, so run them concurrently
+        files_ok, missing_packages, ollama = await asyncio.gather(
+            self._check_files(),
+            self._check_imports(),
+            self._check_ollama(),
+            return_exceptions=True
+        )
+        
+        if files_ok is not True:
             print("❌ Please run this script from the project root directory")
             print("   Expected files: backend/main.py, frontend/app.py")
             return False
         
         # Check Python packages
-        try:
-            import fastapi, uvicorn, streamlit, requests
-            print("✅ Python packages installed")
-        except ImportError as e:
-            print(f"❌ Missing Python package: {e}")
+        if isinstance(missing_packages, Exception):
+            missing_packages = [str(missing_packages)]
+        if missing_packages:
+            print(f"❌ Missing Python package: {', '.join(missing_packages)}")
             print("   Run: pip install -r requirements.txt")
             return False
+        print("✅ Python packages installed")
         
         # Check Ollama
-        try:
-            import requests
-            response = requests.get("http://localhost:11434/api/tags", timeout=3)
-            if response.status_code == 200:
-                print("✅ Ollama is running")
-                
-                # Check Mistral model
-                models = response.json()
-                mistral_found = any("mistral" in model["name"].lower() 
-                                  for model in models.get("models", []))
-                
-                if mistral_found:
-                    print("✅ Mistral model available")
-                else:
-                    print("⚠️  Mistral model not found")
-                    print("   Run: ollama pull mistral")
-                    response = input("   Continue anyway? (y/N): ")
-                    if response.lower() != 'y':
-                        return False
-            else:
-                print("❌ Ollama is not responding properly")
-                return False
-                
-        except Exception:
+        if isinstance(ollama, Exception):
             print("❌ Cannot connect to Ollama")
             print("   Make sure Ollama is running: ollama serve")
             response = input("   Continue anyway? (y/N): ")
             if response.lower() != 'y':
                 return False
+            return True
+        
+        status_code, mistral_found = ollama
+        if status_code != 200:
+            print("❌ Ollama is not responding properly")
+            return False
+        print("✅ Ollama is running")
+        
+        # Check Mistral model
+        if mistral_found:
+            print("✅ Mistral model available")
+        else:
+            print("⚠️  Mistral model not found")
+            print("   Run: ollama pull mistral")
+            response = input("   Continue anyway? (y/N): ")
+            if response.lower() != 'y':
+                return False
         
         return True
 
-    def start_backend(self):
+    async def _spawn(self, args, errors, env=None):
+        """Launch a child process, keeping the tail of its stderr for error reports."""
+        kwargs = {}
+        if platform.system() == "Windows":
+            # Use CREATE_NEW_PROCESS_GROUP for Windows
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            **kwargs
+        )
+        # Keep draining stderr so a chatty child never blocks on a full pipe
+        self.output_tasks.append(asyncio.create_task(self._collect_output(process.stderr, errors)))
+        return process
+
+    async def _collect_output(self, stream, errors):
+        """Store the most recent lines of a child's output."""
+        async for line in stream:
+            errors.append(line.decode(errors="replace").rstrip())
+
+    async def _wait_until_ready(self, name, process, url, errors, timeout=30):
+        """Poll a URL every 100 ms until it answers, failing early if the process dies."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.stop_event.is_set():
+                return False
+            if process.returncode is not None:
+                # Give the output collector a moment to read the last lines
+                await asyncio.sleep(0.1)
+                print(f"❌ {name} failed to start")
+                print(f"Error: {chr(10).join(errors) if errors else 'No error output'}")
+                return False
+            try:
+                status_code, _ = await self._http_get(url, timeout=2)
+                if status_code == 200:
+                    return True
+            except OSError:
+                pass
+            await asyncio.sleep(0.1)
+        
+        print(f"❌ {name} is not responding after {timeout} seconds")
+        return False
+
+    async def start_backend(self):
         """Start the FastAPI backend."""
         print("🚀 Starting FastAPI backend...")
         try:
             # Use Python executable from current environment
             python_exe = sys.executable
-            
-            # For Windows, we might need to handle the path differently
-            if platform.system() == "Windows":
-                # Use CREATE_NEW_PROCESS_GROUP for Windows
-                creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
-                self.backend_process = subprocess.Popen([
-                    python_exe, "-m", "uvicorn", 
-                    "backend.main:app", 
-                    "--reload",
-                    "--host", "0.0.0.0",
-                    "--port", "8000"
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-                creationflags=creation_flags)
+            args = [
+                python_exe, "-m", "uvicorn", 
+                "backend.main:app", 
+                "--host", "0.0.0.0",
+                "--port", "8000",
+                "--http", "httptools"
+            ]
+            if platform.system() != "Windows":
+                # uvloop is not available on Windows
+                args += ["--loop", "uvloop"]
+            if os.environ.get("DEV") == "1":
+                # Auto-reload only works with a single worker
+                args.append("--reload")
             else:
-                # Unix-like systems
-                self.backend_process = subprocess.Popen([
-                    python_exe, "-m", "uvicorn", 
-                    "backend.main:app", 
-                    "--reload",
-                    "--host", "0.0.0.0",
-                    "--port", "8000"
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                # One worker by default: caches, in-flight dedupe and the batcher are per process
+                args += ["--workers", os.environ.get("WORKERS", "1"), "--no-access-log"]
             
-            # Wait a moment and check if it started
-            time.sleep(3)
-            if self.backend_process.poll() is None:
-                print("✅ Backend started on http://localhost:8000")
-                return True
-            else:
-                stdout, stderr = self.backend_process.communicate()
-                print(f"❌ Backend failed to start")
-                print(f"Error: {stderr.decode() if stderr else 'No error output'}")
-                return False
+            self.backend_process = await self._spawn(args, self.backend_errors)
+            return True
         except Exception as e:
             print(f"❌ Failed to start backend: {e}")
             return False
 
-    def start_frontend(self):
+    async def start_frontend(self):
         """Start the Streamlit frontend."""
         print("🎨 Starting Streamlit frontend...")
         try:
@@ -141,136 +223,101 @@ class AppStarter:
             env['STREAMLIT_SERVER_PORT'] = '8501'
             
             python_exe = sys.executable
+            self.frontend_process = await self._spawn([
+                python_exe, "-m", "streamlit", "run", 
+                "frontend/app.py",
+                "--server.port", "8501",
+                "--server.headless", "true"
+            ], self.frontend_errors, env=env)
             
-            if platform.system() == "Windows":
-                # Windows-specific handling
-                creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
-                self.frontend_process = subprocess.Popen([
-                    python_exe, "-m", "streamlit", "run", 
-                    "frontend/app.py",
-                    "--server.port", "8501",
-                    "--server.headless", "true"
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-                env=env, creationflags=creation_flags)
-            else:
-                # Unix-like systems
-                self.frontend_process = subprocess.Popen([
-                    python_exe, "-m", "streamlit", "run", 
-                    "frontend/app.py",
-                    "--server.port", "8501",
-                    "--server.headless", "true"
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
-            
-            # Wait a moment and check if it started
-            time.sleep(4)
-            if self.frontend_process.poll() is None:
+            # Wait until Streamlit answers its health check
+            if await self._wait_until_ready("Frontend", self.frontend_process,
+                                           FRONTEND_HEALTH_URL, self.frontend_errors):
                 print("✅ Frontend started on http://localhost:8501")
                 return True
-            else:
-                stdout, stderr = self.frontend_process.communicate()
-                print(f"❌ Frontend failed to start")
-                print(f"Error: {stderr.decode() if stderr else 'No error output'}")
-                return False
+            return False
         except Exception as e:
             print(f"❌ Failed to start frontend: {e}")
             return False
 
-    def wait_for_backend(self):
+    async def wait_for_backend(self):
         """Wait for backend to be ready."""
         print("⏳ Waiting for backend to be ready...")
-        import requests
-        
-        for i in range(30):  # Wait up to 30 seconds
+        # The backend preloads Mistral before it starts answering, so any 200 means ready
+        if not await self._wait_until_ready("Backend", self.backend_process,
+                                           BACKEND_HEALTH_URL, self.backend_errors,
+                                           timeout=120):
+            return False
+        print("✅ Backend started on http://localhost:8000")
+        print("✅ Backend is ready")
+        return True
+
+    async def _stop_process(self, name, process):
+        """Stop a single child process, forcing it if it doesn't exit in time."""
+        if process is None or process.returncode is not None:
+            return
+        print(f"🛑 Stopping {name.lower()}...")
+        try:
+            if platform.system() == "Windows":
+                # On Windows, use CTRL_BREAK_EVENT for graceful shutdown
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                # On Unix-like systems, use SIGTERM
+                process.terminate()
+            
             try:
-                response = requests.get("http://localhost:8000/", timeout=2)
-                if response.status_code == 200:
-                    print("✅ Backend is ready")
-                    return True
-            except:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                print(f"⚠️  {name} didn't stop gracefully, forcing...")
+                process.kill()
+                await process.wait()
+        except ProcessLookupError:
+            pass
+        except Exception as e:
+            print(f"⚠️  Error stopping {name.lower()}: {e}")
+            try:
+                process.kill()
+            except Exception:
                 pass
-            time.sleep(1)
-        
-        print("❌ Backend is not responding after 30 seconds")
-        return False
 
-    def stop_services(self):
+    async def stop_services(self):
         """Stop both services."""
-        if self.backend_process:
-            print("🛑 Stopping backend...")
-            try:
-                if platform.system() == "Windows":
-                    # On Windows, use CTRL_BREAK_EVENT for graceful shutdown
-                    self.backend_process.send_signal(signal.CTRL_BREAK_EVENT)
-                else:
-                    # On Unix-like systems, use SIGTERM
-                    self.backend_process.terminate()
-                
-                try:
-                    self.backend_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    print("⚠️  Backend didn't stop gracefully, forcing...")
-                    self.backend_process.kill()
-                    self.backend_process.wait()
-            except Exception as e:
-                print(f"⚠️  Error stopping backend: {e}")
-                try:
-                    self.backend_process.kill()
-                except:
-                    pass
-        
-        if self.frontend_process:
-            print("🛑 Stopping frontend...")
-            try:
-                if platform.system() == "Windows":
-                    # On Windows, use CTRL_BREAK_EVENT for graceful shutdown
-                    self.frontend_process.send_signal(signal.CTRL_BREAK_EVENT)
-                else:
-                    # On Unix-like systems, use SIGTERM
-                    self.frontend_process.terminate()
-                
-                try:
-                    self.frontend_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    print("⚠️  Frontend didn't stop gracefully, forcing...")
-                    self.frontend_process.kill()
-                    self.frontend_process.wait()
-            except Exception as e:
-                print(f"⚠️  Error stopping frontend: {e}")
-                try:
-                    self.frontend_process.kill()
-                except:
-                    pass
+        await self._stop_process("Backend", self.backend_process)
+        await self._stop_process("Frontend", self.frontend_process)
+        for task in self.output_tasks:
+            task.cancel()
 
-    def run(self):
+    async def run(self):
         """Main run method."""
         print("🎭 Sentiment Analyzer Startup Script")
         print("=" * 40)
         
-        # Set up signal handlers
-        self.setup_signal_handlers()
-        
         # Check requirements
-        if not self.check_requirements():
+        if not await self.check_requirements():
             print("❌ Requirements check failed. Exiting.")
             return False
         
+        # Set up signal handlers (after the interactive prompts above)
+        self.stop_event = asyncio.Event()
+        self.setup_signal_handlers()
+        
         print("\n🚀 Starting services...")
         
         # Start backend
-        if not self.start_backend():
+        if not await self.start_backend():
             print("❌ Failed to start backend. Exiting.")
             return False
         
         # Wait for backend to be ready
-        if not self.wait_for_backend():
+        if not await self.wait_for_backend():
             print("❌ Backend is not ready. Exiting.")
-            self.stop_services()
+            await self.stop_services()
             return False
         
         # Start frontend
-        if not self.start_frontend():
+        if not await self.start_frontend():
             print("❌ Failed to start frontend. Stopping backend.")
-            self.stop_services()
+            await self.stop_services()
             return False
         
         print("\n🎉 Application is running!")
@@ -281,31 +328,34 @@ class AppStarter:
         print("=" * 40)
         print("Press Ctrl+C to stop both services")
         
-        # Keep running until interrupted
-        try:
-            while self.running:
-                time.sleep(1)
-                
-                # Check if processes are still running
-                if self.backend_process and self.backend_process.poll() is not None:
-                    print("❌ Backend process died unexpectedly")
-                    break
-                    
-                if self.frontend_process and self.frontend_process.poll() is not None:
-                    print("❌ Frontend process died unexpectedly")
-                    break
-                    
-        except KeyboardInterrupt:
-            pass
+        # Sleep until a child exits or we are asked to stop
+        backend_exit = asyncio.ensure_future(self.backend_process.wait())
+        frontend_exit = asyncio.ensure_future(self.frontend_process.wait())
+        stop_requested = asyncio.ensure_future(self.stop_event.wait())
+        done, pending = await asyncio.wait(
+            {backend_exit, frontend_exit, stop_requested},
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        
+        if backend_exit in done:
+            print("❌ Backend process died unexpectedly")
+        if frontend_exit in done:
+            print("❌ Frontend process died unexpectedly")
         
-        self.stop_services()
+        await self.stop_services()
         print("🛑 Services stopped")
         return True
 
 def main():
     """Main entry point."""
     app = AppStarter()
-    success = app.run()
+    try:
+        success = asyncio.run(app.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted")
+        success = False
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":